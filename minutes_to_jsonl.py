@@ -1,9 +1,15 @@
 
-import json
+import asyncio
+import calendar
+import contextlib
+import datetime
+import functools
+import hashlib
+import mmap
 import os
 import re
-import time
-from typing import Any, Dict, List, Optional
+import sqlite3
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 # Load .env if present
 try:
@@ -12,9 +18,21 @@ try:
 except ImportError:
     pass  # dotenv not installed, skip
 
+import orjson
+from aiolimiter import AsyncLimiter
+from dateutil import parser as date_parser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel, Field
+from tenacity import (retry, retry_if_exception, stop_after_attempt,
+                      wait_random_exponential)
+
+# Raised by the google-api-core based Gemini client on HTTP 429; newer SDKs
+# raise a client error carrying the status code instead
+try:
+    from google.api_core.exceptions import ResourceExhausted
+except ImportError:
+    ResourceExhausted = None
 
 # ==========================================
 # 1. CONFIGURATION & API SETUP
@@ -30,16 +48,92 @@ if api_key and api_key != "YOUR_GOOGLE_AI_STUDIO_KEY_HERE":
 else:
     print("Warning: GOOGLE_API_KEY not set or using default placeholder!")
 
+
+def _positive_int_env(name: str, default: int) -> int:
+    """
+    Reads a positive integer setting from the environment, falling back to
+    the default (with a warning) when it is unset or not a positive integer.
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        print(f"Warning: {name}={value!r} is not a positive integer, using {default}")
+        return default
+    return number
+
+
 INPUT_FILE = "minutes.txt"
 OUTPUT_FILE = "formatted_minutes.jsonl"
+CACHE_FILE = ".llm_cache.db"
+MODEL_NAME = "gemini-flash-latest"
+
+# Requests per minute allowed by your Gemini quota (default: free-tier 10),
+# with a few in flight at once
+REQUESTS_PER_MINUTE = _positive_int_env("GEMINI_RPM", 10)
+MAX_CONCURRENCY = 5
+
+# Several meetings share one request so the system prompt is paid once per
+# batch; batches stop growing at either limit. Tokens are estimated locally
+# from the character count, since counting them exactly is an API call.
+MEETINGS_PER_REQUEST = _positive_int_env("MEETINGS_PER_REQUEST", 5)
+MAX_BATCH_TOKENS = 8000
+CHARS_PER_TOKEN = 4
+
+# Output is written through one long-lived handle with a large buffer
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Matches lines with only *** or --- (3 or more), or 'Meeting:' as a separator
+_SPLIT_RE = re.compile(r"\n\s*(?:\*{3,}|-{3,}|Meeting:)\s*\n?")
+# The same separator for raw UTF-8 bytes from the mmap. Bytes patterns know
+# neither text-mode newline translation nor Unicode whitespace, so '\r\n' and
+# lone '\r' count as line breaks and every character str's \s matches is
+# spelled out as its UTF-8 encoding.
+_NEWLINE_BYTES = rb"(?:\r\n?|\n)"
+# U+3000 is the last character \s matches; scanning only up to it keeps this
+# off the import path (all of range(sys.maxunicode + 1) takes about a second).
+_SPACE_BYTES = rb"(?:[\s\x1c-\x1f]|" + b"|".join(
+    re.escape(chr(c).encode("utf-8"))
+    for c in range(0x80, 0x3001) if re.match(r"\s", chr(c))
+) + rb")"
+_SPLIT_RE_BYTES = re.compile(
+    _NEWLINE_BYTES + _SPACE_BYTES + rb"*(?:\*{3,}|-{3,}|Meeting:)"
+    + _SPACE_BYTES + rb"*" + _NEWLINE_BYTES + rb"?"
+)
+# Every supported date shape in one pass: 2004-01-21 and 01/21/2004 (the whole
+# string), "January 21, 2004" / "Jan 21 2004" (trailing text after the year is
+# ignored, as the old loose month-name match did)
+_FAST_DATE_RE = re.compile(
+    r"(?:(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})$"
+    r"|(?P<num_m>\d{1,2})/(?P<num_d>\d{1,2})/(?P<num_y>\d{4})$"
+    r"|(?P<name_m>[A-Za-z]+)\s+(?P<name_d>\d{1,2}),?\s+(?P<name_y>\d{4})(?!\d))"
+)
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name} | {
+    abbr.lower(): i for i, abbr in enumerate(calendar.month_abbr) if abbr
+}
+# A meeting's own date is looked for on the first line of its chunk only, so
+# a "next meeting on ..." further down is not mistaken for it
+_HEADER_DATE_RE = re.compile(
+    r"\b(?:(?:" + "|".join(sorted([*_MONTHS, "sept"], key=len, reverse=True)) + r")\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}"
+    r"|\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{1,2}-\d{1,2})\b",
+    re.IGNORECASE,
+)
+# The same month-day-year shape with the punctuation the fast path rejects
+# ('Sept. 5th, 1980'); only this is handed to dateutil, so it never guesses at
+# other orders, two-digit years or partial dates
+_DATEUTIL_DATE_RE = re.compile(
+    r"[A-Za-z]+\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}(?!\d)", re.IGNORECASE)
 
 
 # ==========================================
 # 2. DATA SCHEMA (Pydantic Model)
 # ==========================================
-class MeetingMinutes(BaseModel):
-    date: str = Field(
-        description="The date of the meeting, standardized to YYYY-MM-DD")
+# Fields the model extracts when the meeting date was already found locally
+class MeetingDetails(BaseModel):
     location: str = Field(
         description="The physical location or home where the meeting occurred"
     )
@@ -66,6 +160,32 @@ class MeetingMinutes(BaseModel):
     )
 
 
+class MeetingMinutes(MeetingDetails):
+    date: str = Field(
+        description="The date of the meeting, standardized to YYYY-MM-DD")
+
+
+class MeetingDetailsBatch(BaseModel):
+    meetings: List[MeetingDetails] = Field(
+        description="One entry per meeting, in the same order as the input"
+    )
+
+
+class MeetingMinutesBatch(BaseModel):
+    meetings: List[MeetingMinutes] = Field(
+        description="One entry per meeting, in the same order as the input"
+    )
+
+
+# A meeting waiting in a batch for the LLM
+class PendingMeeting(NamedTuple):
+    index: int
+    chunk: str
+    chunk_hash: str
+    cache_key: str
+    known_date: str
+
+
 # ==========================================
 # 3. CORE LOGIC
 # ==========================================
@@ -75,107 +195,351 @@ def split_into_meetings(text: str) -> List[str]:
     Splits the giant text file into chunks based on common separators.
     Handles both '***' and '---' as well as 'Meeting:'.
     """
-    # Matches lines with only *** or --- (3 or more), or 'Meeting:' as a separator
-    chunks = re.split(r"\n\s*(?:\*{3,}|-{3,}|Meeting:)\s*\n?", text)
-    return [c.strip() for c in chunks if len(c.strip()) > 50]
+    chunks = (c.strip() for c in _iter_chunks(text, _SPLIT_RE))
+    return [c for c in chunks if len(c) > 50]
+
+def iter_meetings(path: str) -> Iterator[str]:
+    """
+    Streaming version of split_into_meetings: memory-maps the file and
+    yields one decoded chunk at a time instead of reading it all into a str.
+    Line endings are normalised to '\n' like a text-mode read.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # mmap refuses empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in _iter_chunks(mm, _SPLIT_RE_BYTES):
+                chunk = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n").strip()
+                if len(chunk) > 50:
+                    yield chunk
+
+def _iter_chunks(buf, separator: re.Pattern):
+    """
+    Yields the text between separator matches in a single finditer pass,
+    without the intermediate list re.split builds.
+    """
+    prev_end = 0
+    for match in separator.finditer(buf):
+        yield buf[prev_end:match.start()]
+        prev_end = match.end()
+    yield buf[prev_end:]
 
 def standardize_date(date_str: str) -> str:
     """
     Converts various date formats (e.g., 'January 21, 2004', 'Oct 6, 1971') to YYYY-MM-DD.
     Returns empty string if parsing fails.
     """
-    import datetime
-    import calendar
-
-    # Try common formats
-    formats = [
-        "%B %d, %Y",   # January 21, 2004
-        "%b %d, %Y",   # Jan 21, 2004
-        "%B %d %Y",    # January 21 2004
-        "%b %d %Y",    # Jan 21 2004
-        "%m/%d/%Y",    # 01/21/2004
-        "%Y-%m-%d",    # 2004-01-21
-    ]
     date_str = date_str.strip()
-    for fmt in formats:
-        try:
-            dt = datetime.datetime.strptime(date_str, fmt)
-            return dt.strftime("%Y-%m-%d")
-        except Exception:
-            continue
-    # Try to extract month name, day, year manually
-    match = re.match(r"([A-Za-z]+)\s+(\d{1,2}),?\s+(\d{4})", date_str)
+    match = _FAST_DATE_RE.match(date_str)
     if match:
-        month = match.group(1)
-        day = int(match.group(2))
-        year = int(match.group(3))
-        try:
-            month_num = list(calendar.month_name).index(month) if month in calendar.month_name else list(calendar.month_abbr).index(month)
-            dt = datetime.date(year, month_num, day)
-            return dt.strftime("%Y-%m-%d")
-        except Exception:
-            pass
-    return ""
+        if match["iso_y"]:
+            year, month, day = int(match["iso_y"]), int(match["iso_m"]), int(match["iso_d"])
+        elif match["num_y"]:
+            year, month, day = int(match["num_y"]), int(match["num_m"]), int(match["num_d"])
+        else:
+            year, month, day = int(match["name_y"]), _MONTHS.get(match["name_m"].lower()), int(match["name_d"])
+        if month:
+            try:
+                return datetime.date(year, month, day).isoformat()
+            except ValueError:
+                return ""
+    # Abbreviations and ordinals (e.g. 'Sept. 5th, 1980') go through dateutil
+    match = _DATEUTIL_DATE_RE.match(date_str)
+    if not match:
+        return ""
+    try:
+        return date_parser.parse(match.group()).date().isoformat()
+    except (ValueError, OverflowError):
+        return ""
+
+
+def find_meeting_date(meeting_chunk: str) -> str:
+    """
+    Finds the meeting date on the first line of a chunk, as YYYY-MM-DD.
+    Returns empty string if there is none, leaving it to the LLM.
+    """
+    match = _HEADER_DATE_RE.search(meeting_chunk.partition("\n")[0])
+    return standardize_date(match.group()) if match else ""
 
 
+def open_cache(path: str) -> sqlite3.Connection:
+    """
+    Opens (creating if needed) the on-disk cache of extracted meetings.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response BLOB NOT NULL)")
+    return conn
 
-def run_conversion():
-    llm = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0)
-    structured_llm = llm.with_structured_output(MeetingMinutes)
+def cache_key(model: str, prompt_text: str) -> str:
+    """
+    Exact-match cache key: any change to the model, prompt or chunk is a miss.
+    """
+    return hashlib.sha256(f"{model}\0{prompt_text}".encode("utf-8")).hexdigest()
+
+def cache_get(conn: sqlite3.Connection, key: str) -> Optional[Dict[str, Any]]:
+    row = conn.execute(
+        "SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+    return orjson.loads(row[0]) if row else None
 
-    prompt = ChatPromptTemplate.from_messages(
+def cache_put(conn: sqlite3.Connection, key: str, response: Dict[str, Any]) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)",
+        (key, orjson.dumps(response)))
+    conn.commit()
+
+def build_prompt(include_date: bool) -> ChatPromptTemplate:
+    date_field = "date (YYYY-MM-DD), " if include_date else ""
+    return ChatPromptTemplate.from_messages(
         [
             (
                 "system",
                 "You are an expert historical archivist for a motorcycle club. "
-                "Extract all possible structured data from the following meeting minutes. "
-                "Output a JSON object with these fields: "
-                "date (YYYY-MM-DD), location, attendance_members (list of names), attendance_guests (list of names), "
+                "Extract all possible structured data from each of the following meeting minutes. "
+                "For every meeting, output a JSON object with these fields: "
+                f"{date_field}location, attendance_members (list of names), attendance_guests (list of names), "
                 "treasurer_report (dictionary of fund names and amounts), motions (list of objects with description, proposed_by, result), "
-                "key_events (list of strings), next_meeting_info (string), and original_text (the full input text). "
+                "key_events (list of strings), next_meeting_info (string). "
+                "Return exactly one object per meeting, in the order the meetings are given, "
+                "and never mix up details between meetings. "
                 "If a field is missing or not found, use an empty value (empty string, empty list, or empty dict as appropriate). "
                 "Do not hallucinate data. Only use what is present in the text. "
-                "Always standardize dates to YYYY-MM-DD. "
-                "Always include the full input text in the 'original_text' field.",
+                "Always standardize dates to YYYY-MM-DD.",
             ),
-            ("human", "Extract the data from these minutes:\n\n{minutes}"),
+            ("human", "Extract the data from these {count} meetings:\n\n{minutes}"),
         ]
     )
 
-    chain = prompt | structured_llm
+@functools.lru_cache(maxsize=1)
+def _build_chains(
+        loop: asyncio.AbstractEventLoop) -> Dict[bool, Tuple[ChatPromptTemplate, Any]]:
+    """
+    Builds the LLM client and one (prompt, chain) pair per schema, once per
+    event loop. Keyed by whether the meeting date was found locally: those
+    meetings use a prompt and schema without it. The client's async session
+    belongs to the loop it was first used on, so each new loop (e.g. every
+    asyncio.run call) gets fresh chains instead of reusing a closed one.
+    """
+    # Retries are left to call_llm's tenacity wrapper: the client's own
+    # retries (6 by default) would resend 429s without going through the
+    # rate limiter, multiplying with ours
+    llm = ChatGoogleGenerativeAI(model=MODEL_NAME, temperature=0, max_retries=1)
+    chains = {}
+    for dated, schema in ((True, MeetingDetailsBatch), (False, MeetingMinutesBatch)):
+        prompt = build_prompt(include_date=not dated)
+        chains[dated] = (prompt, prompt | llm.with_structured_output(schema))
+    return chains
+
+def format_batch(chunks: List[str]) -> str:
+    """
+    Lays out several meetings in one prompt, each under a numbered header.
+    """
+    return "\n\n".join(
+        f"=== MEETING {n} ===\n{chunk}" for n, chunk in enumerate(chunks, start=1))
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """
+    True for HTTP 429 / RESOURCE_EXHAUSTED errors from the Gemini API, the
+    only failures worth waiting out and retrying. Decided by exception type
+    and status code only: parse errors quote model output, so their messages
+    can contain "429" too.
+    """
+    while exc is not None:
+        if ResourceExhausted is not None and isinstance(exc, ResourceExhausted):
+            return True
+        if 429 in (getattr(exc, "code", None), getattr(exc, "status_code", None)):
+            return True
+        exc = exc.__cause__  # LangChain may wrap the SDK error
+    return False
+
+def chunk_hash(meeting_chunk: str) -> str:
+    return hashlib.sha1(meeting_chunk.encode("utf-8")).hexdigest()
+
+def load_done_hashes(path: str) -> Set[str]:
+    """
+    Collects the chunk hashes already written to the output file so an
+    interrupted run can pick up where it left off.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                done.add(orjson.loads(line)["chunk_hash"])
+            except (ValueError, KeyError):
+                continue  # written before hashes were added
+    return done
+
+def drop_partial_record(path: str) -> None:
+    """
+    Makes sure the output ends on a fresh line before appending. A last
+    line that is a complete record only lost its newline and gets it back;
+    one a crash left half-written is truncated away.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        start, pos = 0, end
+        while pos > 0:
+            step = min(pos, 1 << 16)
+            pos -= step
+            f.seek(pos)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                start = pos + newline + 1
+                break
+        f.seek(start)
+        try:
+            orjson.loads(f.read(end - start))
+        except orjson.JSONDecodeError:
+            f.truncate(start)
+        else:
+            f.write(b"\n")
+
+
+async def run_conversion():
+    chains = _build_chains(asyncio.get_running_loop())
 
     if not os.path.exists(INPUT_FILE):
         print(f"Error: {INPUT_FILE} not found. Please create it.")
         return
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        full_text = f.read()
+    print("Starting conversion...")
 
-    meetings = split_into_meetings(full_text)
-    print(f"Found {len(meetings)} meeting entries. Starting conversion...")
+    drop_partial_record(OUTPUT_FILE)
+    done = load_done_hashes(OUTPUT_FILE)
+    if done:
+        print(f"Resuming: {len(done)} entries already in {OUTPUT_FILE}")
 
-    for i, meeting_chunk in enumerate(meetings):
-        print(f"[{i+1}/{len(meetings)}] Processing...")
-        try:
-            response = chain.invoke({"minutes": meeting_chunk})
-            meeting_dict = response.model_dump()
-            meeting_dict["original_text"] = meeting_chunk
-            # Standardize date if present
-            if "date" in meeting_dict and meeting_dict["date"]:
-                meeting_dict["date"] = standardize_date(meeting_dict["date"])
-            with open(OUTPUT_FILE, "a", encoding="utf-8") as out_f:
-                out_f.write(json.dumps(meeting_dict) + "\n")
-            print(f"      Success: Saved meeting from {meeting_dict['date']}")
-            time.sleep(6)
-        except Exception as e:
-            print(f"      Error on entry {i+1}: {e}")
-            with open("errors.log", "a") as err_log:
-                err_log.write(
-                    f"Entry {i+1} failed: {str(e)}\n---\n{meeting_chunk}\n\n")
-            time.sleep(10)
-            continue
-    print(f"\nProcessing Complete! Your data is in {OUTPUT_FILE}")
+    # The limiter spaces requests evenly to stay under the per-minute quota
+    # (a bucket of one: AsyncLimiter(RPM, 60) would let a burst of RPM through
+    # and then RPM more, about twice the quota in the first minute); the
+    # number of workers caps how many are waiting on the API at once.
+    limiter = AsyncLimiter(1, 60 / REQUESTS_PER_MINUTE)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_CONCURRENCY * 2)
+    # Unbounded, so a worker re-queueing meetings can never block on a full queue
+    retries: asyncio.Queue = asyncio.Queue()
+
+    # Cache, output and error log stay open for the whole run; every write
+    # happens between awaits, so records from different workers never interleave.
+    with contextlib.ExitStack() as stack:
+        cache = stack.enter_context(contextlib.closing(open_cache(CACHE_FILE)))
+        out_f = stack.enter_context(
+            open(OUTPUT_FILE, "ab", buffering=OUTPUT_BUFFER_SIZE))
+        err_log = stack.enter_context(open("errors.log", "a"))
+
+        @retry(
+            retry=retry_if_exception(is_rate_limited),
+            wait=wait_random_exponential(multiplier=1, max=60),
+            stop=stop_after_attempt(6),
+            reraise=True,
+        )
+        async def call_llm(dated: bool, chunks: List[str]) -> BaseModel:
+            _, chain = chains[dated]
+            async with limiter:
+                return await chain.ainvoke(
+                    {"count": len(chunks), "minutes": format_batch(chunks)})
+
+        def save_meeting(meeting_chunk: str, h: str, known_date: str,
+                         meeting_dict: Dict[str, Any]) -> None:
+            date = known_date or meeting_dict.pop("date", "")
+            # Standardize the LLM's date if present
+            if not known_date and date:
+                date = standardize_date(date)
+            record = {"date": date, **meeting_dict,
+                      "original_text": meeting_chunk, "chunk_hash": h}
+            out_f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+            print(f"      Success: Saved meeting from {date}")
 
+        async def process_batch(batch: List[PendingMeeting]) -> None:
+            entries = ", ".join(str(item.index + 1) for item in batch)
+            print(f"[{entries}] Processing...")
+            chunks = [item.chunk for item in batch]
+            try:
+                response = await call_llm(bool(batch[0].known_date), chunks)
+                if len(response.meetings) != len(batch):
+                    raise ValueError(
+                        f"expected {len(batch)} meetings, got {len(response.meetings)}")
+            except Exception as e:
+                if len(batch) > 1:
+                    # Retry each meeting alone so one bad chunk can't sink the rest
+                    print(f"      Error on entries {entries}, retrying one by one: {e}")
+                    for item in batch:
+                        retries.put_nowait([item])
+                    return
+                print(f"      Error on entries {entries}: {e}")
+                for item in batch:
+                    err_log.write(
+                        f"Entry {item.index+1} failed: {str(e)}\n---\n{item.chunk}\n\n")
+                return
+            for item, meeting in zip(batch, response.meetings):
+                # The structured output was validated while parsing and holds only
+                # plain lists/dicts, so a shallow field copy is all orjson needs
+                meeting_dict = dict(meeting)
+                cache_put(cache, item.cache_key, meeting_dict)
+                save_meeting(item.chunk, item.chunk_hash, item.known_date, meeting_dict)
+
+        async def worker() -> None:
+            while True:
+                # Meetings split out of a failed batch go first; the worker that
+                # split them always drains them before taking new work or exiting
+                if not retries.empty():
+                    batch = retries.get_nowait()
+                elif (batch := await queue.get()) is None:
+                    break
+                await process_batch(batch)
+
+        async def produce() -> None:
+            # Dated and undated meetings go to different chains, so each kind
+            # fills its own batch
+            pending = {True: ([], 0), False: ([], 0)}
+            for i, meeting_chunk in enumerate(iter_meetings(INPUT_FILE)):
+                h = chunk_hash(meeting_chunk)
+                if h in done:
+                    continue
+                known_date = find_meeting_date(meeting_chunk)
+                dated = bool(known_date)
+                # Keyed on the prompt this meeting would get on its own, so the
+                # cache does not depend on which other meetings share its batch
+                prompt, _ = chains[dated]
+                key = cache_key(MODEL_NAME, prompt.format(
+                    count=1, minutes=format_batch([meeting_chunk])))
+                meeting_dict = cache_get(cache, key)
+                if meeting_dict is not None:
+                    # Cache hits never reach the API or count against the quota
+                    print(f"[{i+1}] Cached")
+                    save_meeting(meeting_chunk, h, known_date, meeting_dict)
+                    continue
+                batch, batch_tokens = pending[dated]
+                tokens = len(meeting_chunk) // CHARS_PER_TOKEN
+                if batch and batch_tokens + tokens > MAX_BATCH_TOKENS:
+                    await queue.put(batch)
+                    batch, batch_tokens = [], 0
+                batch.append(PendingMeeting(i, meeting_chunk, h, key, known_date))
+                batch_tokens += tokens
+                if len(batch) >= MEETINGS_PER_REQUEST:
+                    await queue.put(batch)
+                    batch, batch_tokens = [], 0
+                pending[dated] = (batch, batch_tokens)
+            for batch, _ in pending.values():
+                if batch:
+                    await queue.put(batch)
+            for _ in range(MAX_CONCURRENCY):
+                await queue.put(None)
+
+        await asyncio.gather(
+            produce(), *(worker() for _ in range(MAX_CONCURRENCY))
+        )
+        out_f.flush()
+        os.fsync(out_f.fileno())
+    print(f"\nProcessing Complete! Your data is in {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    run_conversion()
+    asyncio.run(run_conversion())
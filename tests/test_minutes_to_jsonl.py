@@ -0,0 +1,228 @@
+import asyncio
+import sys
+
+import orjson
+import pytest
+
+import minutes_to_jsonl
+
+
+def _record(h):
+    return orjson.dumps({"date": "", "chunk_hash": h}, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def test_resume_after_record_cut_short(tmp_path):
+    output = tmp_path / "formatted_minutes.jsonl"
+    output.write_bytes(_record("a") + b'{"chunk_hash":"b","da')
+
+    minutes_to_jsonl.drop_partial_record(str(output))
+    with open(output, "ab") as f:
+        f.write(_record("c"))
+
+    assert minutes_to_jsonl.load_done_hashes(str(output)) == {"a", "c"}
+    assert output.read_bytes() == _record("a") + _record("c")
+
+
+def test_resume_with_only_a_partial_record(tmp_path):
+    output = tmp_path / "formatted_minutes.jsonl"
+    output.write_bytes(b'{"chunk_hash":"b","da')
+
+    minutes_to_jsonl.drop_partial_record(str(output))
+
+    assert output.read_bytes() == b""
+
+
+def test_resume_after_only_the_newline_was_lost(tmp_path):
+    output = tmp_path / "formatted_minutes.jsonl"
+    output.write_bytes(_record("a") + _record("b")[:-1])
+
+    minutes_to_jsonl.drop_partial_record(str(output))
+    with open(output, "ab") as f:
+        f.write(_record("c"))
+
+    assert minutes_to_jsonl.load_done_hashes(str(output)) == {"a", "b", "c"}
+    assert output.read_bytes() == _record("a") + _record("b") + _record("c")
+
+
+def test_complete_output_is_left_alone(tmp_path):
+    output = tmp_path / "formatted_minutes.jsonl"
+    output.write_bytes(_record("a") + _record("b"))
+
+    minutes_to_jsonl.drop_partial_record(str(output))
+
+    assert minutes_to_jsonl.load_done_hashes(str(output)) == {"a", "b"}
+
+
+class _ApiError(Exception):
+    def __init__(self, message, **attrs):
+        super().__init__(message)
+        self.__dict__.update(attrs)
+
+
+@pytest.mark.parametrize("exc", [
+    _ApiError("quota exceeded", code=429),
+    _ApiError("quota exceeded", status_code=429),
+])
+def test_rate_limit_errors_are_retried(exc):
+    assert minutes_to_jsonl.is_rate_limited(exc)
+
+
+@pytest.mark.parametrize("exc", [
+    ValueError("validation error: input_value='429 Elm St'"),
+    ValueError("treasurer_report: 1429.50 is not valid"),
+    _ApiError("server error", code=500),
+])
+def test_other_errors_are_not_retried(exc):
+    assert not minutes_to_jsonl.is_rate_limited(exc)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_iter_meetings_matches_text_mode_split(tmp_path, newline):
+    text = newline.join([
+        "January 5, 1980 at Bob's house. Members present: Al, Bea, Cy.",
+        "***",
+        "February 2, 1980 at Joe's garage; discussed the spring run.",
+        "\u00a0---\u3000",
+        "March 1, 1980 at the clubhouse, with much talk about dues.",
+    ])
+    path = tmp_path / "minutes.txt"
+    path.write_bytes(text.encode("utf-8"))
+
+    with open(path, encoding="utf-8") as f:
+        expected = minutes_to_jsonl.split_into_meetings(f.read())
+
+    assert len(expected) == 3
+    assert list(minutes_to_jsonl.iter_meetings(str(path))) == expected
+
+
+def test_no_whitespace_above_the_split_scan_range():
+    assert not any(chr(c).isspace() for c in range(0x3001, sys.maxunicode + 1))
+
+
+def test_chains_are_rebuilt_for_each_event_loop():
+    async def build_twice():
+        loop = asyncio.get_running_loop()
+        return minutes_to_jsonl._build_chains(loop), minutes_to_jsonl._build_chains(loop)
+
+    first, again = asyncio.run(build_twice())
+    second, _ = asyncio.run(build_twice())
+
+    assert first is again
+    assert second is not first
+
+
+class _FakeChain:
+    """
+    Stands in for prompt | llm.with_structured_output(schema); drops one
+    meeting from any batch containing a chunk marked BAD.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.counts = []
+
+    async def ainvoke(self, inputs):
+        count = inputs["count"]
+        self.counts.append(count)
+        if "BAD" in inputs["minutes"]:
+            count -= 1
+        return self.schema(meetings=[
+            {"location": "Bob's", "next_meeting_info": None}] * count)
+
+
+def test_failed_batch_is_retried_one_meeting_at_a_time(tmp_path, monkeypatch):
+    chunks = [
+        f"Meeting held January {n}, 1980 at Bob's house. Members present: Al, Bea."
+        for n in range(1, 24)
+    ]
+    chunks[7] += " BAD"
+    (tmp_path / "minutes.txt").write_text("\n***\n".join(chunks), encoding="utf-8")
+    chain = _FakeChain(minutes_to_jsonl.MeetingDetailsBatch)
+    chains = {True: (minutes_to_jsonl.build_prompt(include_date=False), chain)}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(minutes_to_jsonl, "_build_chains", lambda loop: chains)
+    monkeypatch.setattr(minutes_to_jsonl, "REQUESTS_PER_MINUTE", 60000)
+    monkeypatch.setattr(minutes_to_jsonl, "INPUT_FILE", "minutes.txt")
+    monkeypatch.setattr(minutes_to_jsonl, "OUTPUT_FILE", "formatted_minutes.jsonl")
+    monkeypatch.setattr(minutes_to_jsonl, "CACHE_FILE", "cache.db")
+
+    asyncio.run(minutes_to_jsonl.run_conversion())
+
+    records = [orjson.loads(line) for line in
+               (tmp_path / "formatted_minutes.jsonl").read_bytes().splitlines()]
+    assert sorted(r["original_text"] for r in records) == sorted(
+        chunks[:7] + chunks[8:])
+    errors = (tmp_path / "errors.log").read_text()
+    assert errors.startswith("Entry 8 failed: expected 1 meetings, got 0")
+    assert errors.count("failed:") == 1
+    # Four full batches and a short one, then the failed batch one by one
+    assert sorted(chain.counts) == [1] * 5 + [3] + [5] * 4
+
+
+@pytest.mark.parametrize("first_line, expected", [
+    ("Meeting held January 21, 2004 at Bob's", "2004-01-21"),
+    ("Meeting held Sept. 5th, 1980 at Joe's", "1980-09-05"),
+    ("Meeting held 1/21/2004 at Bob's", "2004-01-21"),
+    ("2004-01-21 meeting at the clubhouse", "2004-01-21"),
+    ("Meeting at the clubhouse", ""),
+])
+def test_find_meeting_date(first_line, expected):
+    chunk = first_line + "\nNext meeting March 3, 1982."
+    assert minutes_to_jsonl.find_meeting_date(chunk) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 10),
+    ("30", 30),
+    ("0", 10),
+    ("-5", 10),
+    ("fast", 10),
+    ("7.5", 10),
+])
+def test_positive_int_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("GEMINI_RPM", raising=False)
+    else:
+        monkeypatch.setenv("GEMINI_RPM", value)
+    assert minutes_to_jsonl._positive_int_env("GEMINI_RPM", 10) == expected
+
+
+@pytest.mark.parametrize("date_str, expected", [
+    # Fast path
+    ("January 21, 2004", "2004-01-21"),
+    ("Jan 21, 2004", "2004-01-21"),
+    ("January 21 2004", "2004-01-21"),
+    ("jan 21 2004", "2004-01-21"),
+    ("Oct 6, 1971 at 7pm", "1971-10-06"),
+    ("01/21/2004", "2004-01-21"),
+    ("1/5/2004", "2004-01-05"),
+    ("2004-01-21", "2004-01-21"),
+    ("  2004-01-21\n", "2004-01-21"),
+    # dateutil fallback
+    ("Sept. 5th, 1980", "1980-09-05"),
+    ("Jan. 21st, 2004", "2004-01-21"),
+    ("Sept 5, 1980 at the clubhouse", "1980-09-05"),
+    # Impossible dates
+    ("February 29, 1900", ""),
+    ("Feb. 29th, 1900", ""),
+    ("February 29, 2000", "2000-02-29"),
+    ("June 31, 2004", ""),
+    ("2004-06-31", ""),
+    ("13/01/2004", ""),
+    # Partial dates
+    ("March 2004", ""),
+    ("May 5", ""),
+    ("2004", ""),
+    # Shapes the original parser did not accept either
+    ("21 January 2004", ""),
+    ("12-25-2004", ""),
+    ("25.12.2004", ""),
+    ("2004/12/25", ""),
+    ("1/2/03", ""),
+    ("01/21/2004 at 7", ""),
+    ("Tuesday, May 4, 1999", ""),
+    ("Meeting 5, 1980", ""),
+    ("", ""),
+])
+def test_standardize_date(date_str, expected):
+    assert minutes_to_jsonl.standardize_date(date_str) == expected